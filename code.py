@@ -3,6 +3,9 @@
 # SMART HOME COMMAND PARSER (CFG-based with Stack Trace)
 # ------------------------------------------------------
 
+import sys
+from functools import lru_cache
+
 # --------------------
 # Grammar definition
 # --------------------
@@ -11,11 +14,13 @@ grammar = {
     "ACTION": [["VERB", "SWITCH", "TARGET"]],
     "VERB": [["turn"], ["switch"]],
     "SWITCH": [["on"], ["off"]],
-    "TARGET": [["ALL_PHRASE"], ["DEVICE_PHRASE"], ["DEVICE_IN_ROOM"]],
+    # Left-factored: DEVICE_NP is parsed once, and a room may come before
+    # the device or after it ("in ROOM"), never both.
+    "TARGET": [["ALL_PHRASE"], ["the", "THE_REST"], ["in", "ROOM", "DEVICE_NP"],
+               ["DEVICE_NP", "LOCATION_TAIL"]],
+    "THE_REST": [["ROOM", "DEVICE_NP"], ["DEVICE_NP", "LOCATION_TAIL"]],
     "ALL_PHRASE": [["all", "DEVICE_PLURAL"]],
-    "DEVICE_PHRASE": [["LOCATION_OPT", "DEVICE_NP"]],
-    "DEVICE_IN_ROOM": [["DEVICE_NP", "in", "ROOM"]],
-    "LOCATION_OPT": [["the", "ROOM"], ["in", "ROOM"], ["the"], []],
+    "LOCATION_TAIL": [["in", "ROOM"], []],
     "DEVICE_NP": [
         ["lights"], ["light"], ["fan"], ["fans"],
         ["heater"], ["air", "conditioner"], ["conditioner"]
@@ -29,6 +34,84 @@ grammar = {
     ]
 }
 
+# Intern every symbol; tokenize() interns its words too, so looking a word
+# up in term_id resolves by pointer identity instead of comparing characters.
+grammar = {sys.intern(a): [[sys.intern(s2) for s2 in prod] for prod in prods]
+           for a, prods in grammar.items()}
+
+# --------------------
+# Integer symbol tables (built once from the grammar)
+# --------------------
+symbols = list(grammar)  # nonterminals first, then terminals
+for _prods in grammar.values():
+    for _prod in _prods:
+        for _s in _prod:
+            if _s not in grammar and _s not in symbols:
+                symbols.append(_s)
+sym_id = {s: n for n, s in enumerate(symbols)}
+is_terminal = [s not in grammar for s in symbols]
+productions = [[[sym_id[s2] for s2 in prod] for prod in grammar.get(s, [])] for s in symbols]
+production_text = [[' '.join(prod) if prod else 'ε' for prod in grammar.get(s, [])] for s in symbols]
+term_id = {s: sym_id[s] for s in symbols if s not in grammar}
+EOF = len(symbols)  # lookahead id past the last token
+UNKNOWN = EOF + 1  # id for out-of-vocabulary tokens, never matches a terminal
+COMMAND = sym_id["COMMAND"]
+
+# --------------------
+# LL(1) predict table (FIRST/FOLLOW fixed point)
+# --------------------
+nullable = [False] * len(symbols)
+first = [{n} if t else set() for n, t in enumerate(is_terminal)]
+
+def first_of_seq(seq):
+    out = set()
+    for s2 in seq:
+        out |= first[s2]
+        if not nullable[s2]:
+            return out, False
+    return out, True
+
+_changed = True
+while _changed:
+    _changed = False
+    for _a, _prods in enumerate(productions):
+        for _prod in _prods:
+            _f, _eps = first_of_seq(_prod)
+            if not _f <= first[_a]:
+                first[_a] |= _f
+                _changed = True
+            if _eps and not nullable[_a]:
+                nullable[_a] = _changed = True
+
+follow = [set() for _ in symbols]
+follow[COMMAND].add(EOF)
+_changed = True
+while _changed:
+    _changed = False
+    for _a, _prods in enumerate(productions):
+        for _prod in _prods:
+            for _k, _b in enumerate(_prod):
+                if is_terminal[_b]:
+                    continue
+                _f, _eps = first_of_seq(_prod[_k + 1:])
+                if _eps:
+                    _f = _f | follow[_a]
+                if not _f <= follow[_b]:
+                    follow[_b] |= _f
+                    _changed = True
+
+# predict[A][lookahead] -> production indices that can start with it.
+# The grammar is LL(1), so each cell holds exactly one.
+predict = [{} for _ in symbols]
+for _a, _prods in enumerate(productions):
+    for _k, _prod in enumerate(_prods):
+        _f, _eps = first_of_seq(_prod)
+        for _t in (_f | follow[_a]) if _eps else _f:
+            predict[_a][_t] = predict[_a].get(_t, ()) + (_k,)
+assert all(len(rules) == 1 for row in predict for rules in row.values()), "grammar is not LL(1)"
+# expand[A][lookahead] -> predicted RHS, reversed for pushing onto a stack
+expand = [{t: productions[a][k][::-1] for t, (k,) in row.items()} for a, row in enumerate(predict)]
+
 # --------------------
 # Tokenizer
 # --------------------
@@ -37,44 +120,129 @@ def tokenize(s):
     if s.endswith('.'):
         s = s[:-1]
     tokens = s.split()
-    return tokens
+    return [sys.intern(t) for t in tokens]
+
+def encode(tokens):
+    return [term_id.get(t, UNKNOWN) for t in tokens]
 
 # --------------------
-# Parser (recursive descent for better accuracy)
+# Parser (table-driven LL(1); recursive variant for the trace)
 # --------------------
-def parse_symbol(symbol, tokens, i, trace):
-    if symbol not in grammar:  # terminal
-        if i < len(tokens) and tokens[i] == symbol:
-            trace.append(f"Matched terminal '{symbol}'")
-            return True, i + 1
+def _parse_fast(ids):
+    # Table-driven LL(1) loop: an explicit stack of pending symbols stands in
+    # for the recursion, and expand[] already holds each RHS reversed for it.
+    n = len(ids)
+    stack = [COMMAND]
+    i = 0
+    while stack:
+        sym = stack.pop()
+        la = ids[i] if i < n else EOF
+        if is_terminal[sym]:
+            if la != sym:
+                return False
+            i += 1
         else:
-            trace.append(f"❌ Expected '{symbol}', got '{tokens[i] if i < len(tokens) else 'EOF'}'")
-            return False, i
+            rhs = expand[sym].get(la)
+            if rhs is None:
+                return False
+            stack += rhs
+    return i == n
+
+def _parse_symbol_trace(sym, ids, i, trace, tokens):
+    # Recursive form of the same LL(1) parse, kept for the step-by-step trace.
+    if is_terminal[sym]:
+        if i < len(ids) and ids[i] == sym:
+            trace.append(f"Matched terminal '{symbols[sym]}'")
+            return True, i + 1
+        trace.append(f"❌ Expected '{symbols[sym]}', got '{tokens[i] if i < len(tokens) else 'EOF'}'")
+        return False, i
 
-    for prod in grammar[symbol]:
-        trace.append(f"Expanding {symbol} → {' '.join(prod) if prod else 'ε'}")
-        j = i
-        success = True
-        for s2 in prod:
-            ok, j = parse_symbol(s2, tokens, j, trace)
-            if not ok:
-                success = False
-                break
-        if success:
-            return True, j
-        trace.append(f"Backtrack on rule {symbol} → {' '.join(prod) if prod else 'ε'}")
-
-    return False, i
+    rules = predict[sym].get(ids[i] if i < len(ids) else EOF)
+    if rules is None:
+        trace.append(f"❌ No rule for {symbols[sym]} on '{tokens[i] if i < len(tokens) else 'EOF'}'")
+        return False, i
+    k = rules[0]
+    trace.append(f"Expanding {symbols[sym]} → {production_text[sym][k]}")
+    j = i
+    for s2 in productions[sym][k]:
+        ok, j = _parse_symbol_trace(s2, ids, j, trace, tokens)
+        if not ok:
+            return False, i
+    return True, j
 
 def parse(tokens, show_trace=False):
+    if not show_trace:
+        return _parse_fast(encode(tokens))
     trace = []
-    ok, index = parse_symbol("COMMAND", tokens, 0, trace)
-    if show_trace:
-        print("\n--- PARSING TRACE ---")
-        for line in trace:
-            print(line)
+    ok, index = _parse_symbol_trace(COMMAND, encode(tokens), 0, trace, tokens)
+    print("\n--- PARSING TRACE ---")
+    for line in trace:
+        print(line)
     return ok and index == len(tokens)
 
+# --------------------
+# Word DFA (tokenize + parse fused into one scan)
+# --------------------
+# The grammar is not recursive, so the LL(1) stack can only take finitely
+# many shapes. Each reachable stack becomes a DFA state, and dfa_next[state]
+# maps the next word to the state left after the parser consumes it.
+def _consume(stack, la):
+    stack = list(stack)
+    while stack:
+        sym = stack.pop()
+        if is_terminal[sym]:
+            return tuple(stack) if sym == la else None
+        rhs = expand[sym].get(la)
+        if rhs is None:
+            return None
+        stack += rhs
+    return None if la != EOF else ()
+
+dfa_stacks = [(COMMAND,)]
+dfa_state = {(COMMAND,): 0}
+dfa_next = []
+for _stack in dfa_stacks:  # grows while new stacks are discovered
+    _row = {}
+    for _word, _t in term_id.items():
+        _nxt = _consume(_stack, _t)
+        if _nxt is not None:
+            if _nxt not in dfa_state:
+                dfa_state[_nxt] = len(dfa_stacks)
+                dfa_stacks.append(_nxt)
+            _row[_word] = dfa_state[_nxt]
+    dfa_next.append(_row)
+dfa_accept = [_consume(stack, EOF) == () for stack in dfa_stacks]
+
+def recognize(text):
+    # Same answer as parse(tokenize(text)), in a single pass over the
+    # characters: each word is looked up as soon as it ends, no token list.
+    s = text.strip().lower()
+    if s.endswith('.'):
+        s = s[:-1]
+    state = 0
+    start = -1
+    i = 0
+    while i < len(s):
+        if s[i].isspace():
+            if start >= 0:
+                state = dfa_next[state].get(s[start:i])
+                if state is None:
+                    return False
+                start = -1
+        elif start < 0:
+            start = i
+        i += 1
+    if start >= 0:
+        state = dfa_next[state].get(s[start:])
+        if state is None:
+            return False
+    return dfa_accept[state]
+
+@lru_cache(maxsize=2048)
+def parse_cached(text):
+    # Untraced check, memoized on the raw command (repeated commands are common)
+    return recognize(text)
+
 # --------------------
 # Commands
 # --------------------
@@ -98,17 +266,22 @@ commands = [
 # --------------------
 # Interactive Mode
 # --------------------
+SHOW_TRACE = True  # set False to skip the trace and answer from parse_cached
+
 print("------ SMART HOME COMMAND PARSER (Fixed & Traced) ------")
 print("Examples you can try:")
 for c in commands[:10]:
     print(" •", c)
 print("\nType 'exit' to quit.\n")
 
+if not SHOW_TRACE:
+    for c in commands:
+        parse_cached(c)
+
 while True:
     user_input = input("Enter a command: ").strip()
     if user_input.lower() == "exit":
         print("Exiting... Goodbye!")
         break
-    tokens = tokenize(user_input)
-    result = parse(tokens, show_trace=True)
+    result = parse(tokenize(user_input), show_trace=True) if SHOW_TRACE else parse_cached(user_input)
     print(f"\nFinal Result: {'✅ Correct' if result else '❌ Incorrect'}\n")
\ No newline at end of file
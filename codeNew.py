@@ -3,22 +3,36 @@
 # Updated version with 🕒 & ⚠️ user feedback
 # ===============================================
 
-import re, time, uuid, json, sqlite3, threading, sched, logging
+import re, sys, time, uuid, json, sqlite3, threading, sched, logging, atexit
 from datetime import datetime, timedelta
 
+try:  # optional: JIT-compiled batch parser
+    import numpy as np
+    from numba import njit, prange
+except ImportError:
+    np = njit = prange = None
+
 # ---------- Logging ----------
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger("SmartHome")
 
 # ---------- Database ----------
 DB_FILENAME = "smart_home_interactive.db"
+FLUSH_EVERY = 32        # queued events that trigger an early commit
+FLUSH_INTERVAL = 2.0    # seconds between background commits
+
+def _iso_to_ns(ts):
+    return round(datetime.fromisoformat(ts).timestamp() * 1e6) * 1000
 
-def init_db():
-    conn = sqlite3.connect(DB_FILENAME)
+def init_db(conn):
+    # id: 16-byte uuid BLOB, ts_created: epoch ns; older TEXT tables are converted
     cur = conn.cursor()
+    old = cur.execute("PRAGMA table_info(events)").fetchall()
+    migrate = bool(old) and old[0][2].upper() == "TEXT"
+    if migrate: cur.execute("ALTER TABLE events RENAME TO events_text")
     cur.execute('''CREATE TABLE IF NOT EXISTS events (
-        id TEXT PRIMARY KEY,
-        ts_created TEXT,
+        id BLOB PRIMARY KEY,
+        ts_created INTEGER,
         command_text TEXT,
         action_type TEXT,
         target TEXT,
@@ -26,50 +40,105 @@ def init_db():
         status TEXT,
         meta TEXT
     )''')
-    conn.commit(); conn.close()
+    if migrate:
+        rows = cur.execute("SELECT * FROM events_text").fetchall()
+        cur.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(uuid.UUID(r[0]).bytes, _iso_to_ns(r[1])) + tuple(r[2:]) for r in rows])
+        cur.execute("DROP TABLE events_text")
+    conn.commit()
+
+class EventStore:
+    """Single shared connection; events are queued and committed in batches."""
+    def __init__(self, path=DB_FILENAME):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        init_db(self.conn)
+        self.lock = threading.Lock()
+        self.pending = []
+        self.wake = threading.Event()
+        self.closed = False
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+        atexit.register(self.close)
+
+    def persist_event(self, ev: dict):
+        row = (ev['id'], ev['ts_created'], ev['command_text'], ev['action_type'],
+               ev.get('target') or '', ev.get('scheduled_time') or '',
+               ev.get('status') or 'scheduled', json.dumps(ev.get('meta') or {}))
+        with self.lock:
+            self.pending.append(row)
+            full = len(self.pending) >= FLUSH_EVERY
+        if full: self.wake.set()
 
-def persist_event(ev: dict):
-    conn = sqlite3.connect(DB_FILENAME)
-    cur = conn.cursor()
-    cur.execute('''INSERT OR REPLACE INTO events
-        (id, ts_created, command_text, action_type, target, scheduled_time, status, meta)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-        (ev['id'], ev['ts_created'], ev['command_text'], ev['action_type'],
-         ev.get('target') or '', ev.get('scheduled_time') or '',
-         ev.get('status') or 'scheduled', json.dumps(ev.get('meta') or {})))
-    conn.commit(); conn.close()
+    def flush(self):
+        # rows leave the queue only once they are committed; on error they stay for the next try
+        with self.lock:
+            if self.closed or not self.pending:
+                return
+            try:
+                self.conn.executemany('''INSERT OR REPLACE INTO events
+                    (id, ts_created, command_text, action_type, target, scheduled_time, status, meta)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', self.pending)
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+            self.pending = []
+
+    def close(self):
+        # final flush, then close so SQLite checkpoints the WAL into the .db file
+        try:
+            self.flush()
+        finally:
+            with self.lock:
+                if not self.closed:
+                    self.closed = True
+                    self.conn.close()
+
+    def _flush_loop(self):
+        while True:
+            self.wake.wait(FLUSH_INTERVAL)
+            self.wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Event flush failed, will retry: {e}")
 
 # ---------- Device Controller ----------
 class DeviceController:
+    STATES = ('off', 'on')
+
     def __init__(self):
-        self.devices = {
-            'living room lights': {'state': 'off'},
-            'kitchen fan': {'state': 'off'},
-            'bedroom heater': {'state': 'off'},
-            'bathroom lights': {'state': 'off'},
-            'air conditioner': {'state': 'off'}
-        }
-        self.lock = threading.Lock()
+        # fixed device table: name -> slot, states[slot] is 0 (off) / 1 (on)
+        self.names = ['living room lights', 'kitchen fan', 'bedroom heater',
+                      'bathroom lights', 'air conditioner']
+        self.name_to_id = {n: i for i, n in enumerate(self.names)}
+        self.states = [0] * len(self.names)
+        self.lock = threading.RLock()
 
     def list_devices(self):
-        return list(self.devices.keys())
+        return list(self.names)
 
     def set_device(self, name, state):
-        name = name.strip().replace("  ", " ")
-        with self.lock:
-            if name in self.devices:
-                old = self.devices[name]['state']
-                self.devices[name]['state'] = state
-                logger.info(f"✅ {name}: {old} → {state}")
-                return True
-            logger.warning(f"⚠️ Unknown device '{name}'")
+        i = self.name_to_id.get(name)
+        if i is None:  # interpret() already yields clean names; tidy anything else
+            i = self.name_to_id.get(" ".join(name.split()))
+        if i is None:
+            logger.warning(f"⚠️ Unknown device '{name.strip()}'")
             return False
+        with self.lock:
+            old = self.states[i]
+            self.states[i] = 1 if state == 'on' else 0
+        logger.info(f"✅ {self.names[i]}: {self.STATES[old]} → {state}")
+        return True
 
 # ---------- Tokenizer ----------
+_STRIP_PUNCT = str.maketrans('', '', '.,;!?')
+
 def tokenize(s):
     s = s.strip().lower()
-    s = re.sub(r'[.,;!?]', '', s)
-    return s.split()
+    s = s.translate(_STRIP_PUNCT)
+    return [sys.intern(t) for t in s.split()]
 
 # ---------- Grammar ----------
 GRAMMAR = {
@@ -77,7 +146,8 @@ GRAMMAR = {
  "ACTION":[["VERB","SWITCH","DEVICE"]],
  "VERB":[["turn"],["switch"]],
  "SWITCH":[["on"],["off"]],
- "DEVICE":[["the","ROOM","DEVICE_NP"],["DEVICE_NP","in","ROOM"],["DEVICE_NP"]],
+ "DEVICE":[["the","ROOM","DEVICE_NP"],["DEVICE_NP","LOCATION_OPT"]],
+ "LOCATION_OPT":[["in","ROOM"],[]],
  "ROOM":[["living","room"],["kitchen"],["bedroom"],["bathroom"]],
  "DEVICE_NP":[["light"],["lights"],["fan"],["heater"],["air","conditioner"]],
  "SCHEDULE":[["REMIND_PHRASE","TASK","TIME_PHRASE"]],
@@ -87,124 +157,320 @@ GRAMMAR = {
  "TIME":[["6","pm"],["7","am"],["3","pm"],["9","am"]],
  "DURATION":[["1","hour"],["2","hours"],["30","minutes"]]
 }
-
-def parse_symbol(sym, tokens, i, trace):
-    if sym not in GRAMMAR:
-        if i < len(tokens) and tokens[i] == sym:
-            trace.append(f"✓ Matched '{sym}'")
+# interned, like tokenize() output, so TERM_ID lookups hit on identity
+GRAMMAR = {sys.intern(a): [[sys.intern(s2) for s2 in prod] for prod in prods] for a, prods in GRAMMAR.items()}
+
+# symbol ids: nonterminals first, then terminals; the parser only sees ints
+SYMBOLS = list(GRAMMAR)
+for _prods in GRAMMAR.values():
+    for _prod in _prods:
+        for _s in _prod:
+            if _s not in GRAMMAR and _s not in SYMBOLS:
+                SYMBOLS.append(_s)
+SYM_ID = {s: n for n, s in enumerate(SYMBOLS)}
+IS_TERMINAL = [s not in GRAMMAR for s in SYMBOLS]
+PRODUCTIONS = [[[SYM_ID[s2] for s2 in prod] for prod in GRAMMAR.get(s, [])] for s in SYMBOLS]
+PRODUCTION_TEXT = [[' '.join(prod) or 'ε' for prod in GRAMMAR.get(s, [])] for s in SYMBOLS]
+TERM_ID = {s: SYM_ID[s] for s in SYMBOLS if s not in GRAMMAR}
+EOF = len(SYMBOLS)  # lookahead past the last token
+UNKNOWN = EOF + 1  # out-of-vocabulary token, matches nothing
+COMMAND = SYM_ID["COMMAND"]
+
+# LL(1): FIRST/FOLLOW by fixed point, then PREDICT[A][lookahead] -> (rule,)
+NULLABLE = [False] * len(SYMBOLS)
+FIRST = [{n} if t else set() for n, t in enumerate(IS_TERMINAL)]
+FOLLOW = [set() for _ in SYMBOLS]
+FOLLOW[COMMAND].add(EOF)
+
+def first_of_seq(seq):
+    out = set()
+    for s2 in seq:
+        out |= FIRST[s2]
+        if not NULLABLE[s2]: return out, False
+    return out, True
+
+_changed = True
+while _changed:
+    _changed = False
+    for _a, _prods in enumerate(PRODUCTIONS):
+        for _prod in _prods:
+            _f, _eps = first_of_seq(_prod)
+            if not _f <= FIRST[_a]: FIRST[_a] |= _f; _changed = True
+            if _eps and not NULLABLE[_a]: NULLABLE[_a] = _changed = True
+_changed = True
+while _changed:
+    _changed = False
+    for _a, _prods in enumerate(PRODUCTIONS):
+        for _prod in _prods:
+            for _k, _b in enumerate(_prod):
+                if IS_TERMINAL[_b]: continue
+                _f, _eps = first_of_seq(_prod[_k + 1:])
+                if _eps: _f = _f | FOLLOW[_a]
+                if not _f <= FOLLOW[_b]: FOLLOW[_b] |= _f; _changed = True
+
+PREDICT = [{} for _ in SYMBOLS]
+for _a, _prods in enumerate(PRODUCTIONS):
+    for _k, _prod in enumerate(_prods):
+        _f, _eps = first_of_seq(_prod)
+        for _t in (_f | FOLLOW[_a]) if _eps else _f:
+            PREDICT[_a][_t] = PREDICT[_a].get(_t, ()) + (_k,)
+assert all(len(rules) == 1 for row in PREDICT for rules in row.values()), "GRAMMAR is not LL(1)"
+# EXPAND[A][lookahead] -> predicted RHS, reversed for the parse stack
+EXPAND = [{t: PRODUCTIONS[a][k][::-1] for t, (k,) in row.items()} for a, row in enumerate(PREDICT)]
+
+def encode(tokens):
+    return [TERM_ID.get(t, UNKNOWN) for t in tokens]
+
+def _parse_fast(ids):
+    # LL(1) loop over an explicit symbol stack; no recursion, no backtracking
+    n = len(ids); stack = [COMMAND]; i = 0
+    while stack:
+        sym = stack.pop()
+        la = ids[i] if i < n else EOF
+        if IS_TERMINAL[sym]:
+            if la != sym: return False
+            i += 1
+        else:
+            rhs = EXPAND[sym].get(la)
+            if rhs is None: return False
+            stack += rhs
+    return i == n
+
+def _parse_symbol_trace(sym, ids, i, trace, tokens):
+    # recursive form of the same LL(1) parse, kept for the step-by-step trace
+    if IS_TERMINAL[sym]:
+        if i < len(ids) and ids[i] == sym:
+            trace.append(f"✓ Matched '{SYMBOLS[sym]}'")
             return True, i + 1
-        trace.append(f"❌ Expected '{sym}', got '{tokens[i] if i < len(tokens) else 'EOF'}'")
+        trace.append(f"❌ Expected '{SYMBOLS[sym]}', got '{tokens[i] if i < len(tokens) else 'EOF'}'")
+        return False, i
+    rules = PREDICT[sym].get(ids[i] if i < len(ids) else EOF)
+    if rules is None:
+        trace.append(f"❌ No rule for {SYMBOLS[sym]} on '{tokens[i] if i < len(tokens) else 'EOF'}'")
         return False, i
-    for prod in GRAMMAR[sym]:
-        j = i; ok = True
-        trace.append(f"Expanding {sym} → {' '.join(prod)}")
-        for s2 in prod:
-            ok, j = parse_symbol(s2, tokens, j, trace)
-            if not ok: break
-        if ok: return True, j
-        trace.append(f"Backtrack on {sym} → {' '.join(prod)}")
-    return False, i
-
-def parse_command(tokens):
+    k = rules[0]; j = i
+    trace.append(f"Expanding {SYMBOLS[sym]} → {PRODUCTION_TEXT[sym][k]}")
+    for s2 in PRODUCTIONS[sym][k]:
+        ok, j = _parse_symbol_trace(s2, ids, j, trace, tokens)
+        if not ok: return False, i
+    return True, j
+
+def parse_command(tokens, show_trace=False):
+    if not show_trace:
+        return _parse_fast(encode(tokens)), []
     trace = []
-    ok, idx = parse_symbol("COMMAND", tokens, 0, trace)
+    ok, idx = _parse_symbol_trace(COMMAND, encode(tokens), 0, trace, tokens)
     return ok and idx == len(tokens), trace
 
+# ---------- Word DFA (tokenize + parse in one scan) ----------
+# GRAMMAR is not recursive, so the LL(1) stack has finitely many shapes;
+# each reachable one is a DFA state, DFA_NEXT[state][word] -> next state.
+def _consume(stack, la):
+    stack = list(stack)
+    while stack:
+        sym = stack.pop()
+        if IS_TERMINAL[sym]: return tuple(stack) if sym == la else None
+        rhs = EXPAND[sym].get(la)
+        if rhs is None: return None
+        stack += rhs
+    return None if la != EOF else ()
+
+_dfa_stacks = [(COMMAND,)]
+_dfa_state = {(COMMAND,): 0}
+DFA_NEXT = []
+for _stack in _dfa_stacks:  # grows as new stacks are reached
+    _row = {}
+    for _word, _t in TERM_ID.items():
+        _nxt = _consume(_stack, _t)
+        if _nxt is None: continue
+        if _nxt not in _dfa_state:
+            _dfa_state[_nxt] = len(_dfa_stacks); _dfa_stacks.append(_nxt)
+        _row[_word] = _dfa_state[_nxt]
+    DFA_NEXT.append(_row)
+DFA_ACCEPT = [_consume(st, EOF) == () for st in _dfa_stacks]
+
+def recognize(text):
+    """parse_command(tokenize(text))[0] in one pass, without a token list."""
+    s = text.strip().lower().translate(_STRIP_PUNCT)
+    state = 0; start = -1; i = 0
+    while i < len(s):
+        if s[i].isspace():
+            if start >= 0:
+                state = DFA_NEXT[state].get(s[start:i])
+                if state is None: return False
+                start = -1
+        elif start < 0:
+            start = i
+        i += 1
+    if start >= 0:
+        state = DFA_NEXT[state].get(s[start:])
+        if state is None: return False
+    return DFA_ACCEPT[state]
+
+# ---------- Batch Parsing (Numba) ----------
+# Same LL(1) tables flattened to int32 arrays: TABLE[A, lookahead] is a rule
+# number (-1 = no rule) whose right-hand side is RHS[RHS_OFF[r, 0]:RHS_OFF[r, 1]].
+# The kernel keeps an explicit symbol stack instead of recursing; GRAMMAR is
+# not recursive, so it never holds more than STACK_DEPTH symbols.
+if njit is not None:
+    _rule_no, _rhs, _off = {}, [], []
+    for _a, _prods in enumerate(PRODUCTIONS):
+        for _k, _prod in enumerate(_prods):
+            _rule_no[(_a, _k)] = len(_off)
+            _off.append((len(_rhs), len(_rhs) + len(_prod)))
+            _rhs += _prod
+    TABLE = np.full((len(GRAMMAR), UNKNOWN + 1), -1, np.int32)
+    for _a, _row in enumerate(PREDICT[:len(GRAMMAR)]):
+        for _t, (_k,) in _row.items():
+            TABLE[_a, _t] = _rule_no[(_a, _k)]
+    RHS = np.array(_rhs, np.int32)
+    RHS_OFF = np.array(_off, np.int32)
+    STACK_DEPTH = len(GRAMMAR) * max(hi - lo for lo, hi in _off) + 1
+
+    @njit(cache=True)
+    def _ll1_run(table, rhs, rhs_off, toks, stack, start, n_nonterm, eof):
+        stack[0] = start; sp = 1; i = 0; n = toks.shape[0]
+        while sp > 0:
+            sp -= 1
+            sym = stack[sp]
+            la = toks[i] if i < n else eof
+            if sym >= n_nonterm:  # terminal
+                if la != sym: return False, i
+                i += 1
+                continue
+            r = table[sym, la]
+            if r < 0: return False, i
+            lo = rhs_off[r, 0]; hi = rhs_off[r, 1]
+            if sp + hi - lo > stack.shape[0]: return False, i
+            for k in range(hi - 1, lo - 1, -1):
+                stack[sp] = rhs[k]; sp += 1
+        return True, i
+
+    @njit(parallel=True, cache=True)
+    def _parse_batch(flat, offsets, table, rhs, rhs_off, start, n_nonterm, eof, depth):
+        out = np.zeros(offsets.shape[0] - 1, np.bool_)
+        for c in prange(out.shape[0]):
+            toks = flat[offsets[c]:offsets[c + 1]]
+            ok, idx = _ll1_run(table, rhs, rhs_off, toks, np.empty(depth, np.int32), start, n_nonterm, eof)
+            out[c] = ok and idx == toks.shape[0]
+        return out
+
+def parse_batch(token_lists):
+    """Accept/reject many tokenized commands in one call (no trace)."""
+    if njit is None:
+        return [parse_command(tokens)[0] for tokens in token_lists]
+    ids = [encode(tokens) for tokens in token_lists]
+    offsets = np.zeros(len(ids) + 1, np.int32)
+    np.cumsum([len(x) for x in ids], out=offsets[1:])
+    flat = np.fromiter((t for x in ids for t in x), np.int32, int(offsets[-1]))
+    return _parse_batch(flat, offsets, TABLE, RHS, RHS_OFF,
+                        COMMAND, len(GRAMMAR), EOF, STACK_DEPTH).tolist()
+
 # ---------- Interpreter ----------
+# one scan extracts every field; which named groups matched picks the branch
+_CMD_RE = re.compile(
+    r'(?P<verb>turn|switch)\s+(?P<state>on|off)\s+(?:the\s+)?'
+    r'(?:(?P<room>living room|kitchen|bedroom|bathroom)\s+)?(?P<dev>lights?|fan|heater|air conditioner)'
+    r'|(?P<sched>remind me to|set alarm for|schedule a)\s+(?P<task>.+?)\s+'
+    r'(?:at\s+(?P<at_h>\d{1,2})\s*(?P<at_ap>am|pm)'
+    r'|after\s+(?P<dur_n>\d+)\s+(?P<dur_u>hours?|minutes?)'
+    r'|tomorrow\s+at\s+(?P<tm_h>\d{1,2})\s*(?P<tm_ap>am|pm))')
+
+# precomputed converters: "H am|pm" -> 24h hour, unit word -> one unit
+TIME_TABLE = {f"{h} {ap}": h % 12 + (12 if ap == 'pm' else 0) for h in range(13) for ap in ('am', 'pm')}
+DURATION_TABLE = {'hour': timedelta(hours=1), 'hours': timedelta(hours=1),
+                  'minute': timedelta(minutes=1), 'minutes': timedelta(minutes=1)}
+
 def parse_time_of_day(t, ref=None):
     ref = ref or datetime.now()
-    m = re.match(r'(\d{1,2})\s*(am|pm)', t)
-    if not m: raise ValueError
-    h = int(m.group(1)); ampm = m.group(2)
-    if ampm == 'pm' and h != 12: h += 12
-    if ampm == 'am' and h == 12: h = 0
+    h = TIME_TABLE.get(t)
+    if h is None:  # also accept "6pm" / "06 pm": fold into the "H am|pm" key
+        try: h = TIME_TABLE.get(f"{int(t[:-2])} {t[-2:]}")
+        except ValueError: pass
+    if h is None: raise ValueError(t)
     dt = ref.replace(hour=h, minute=0, second=0, microsecond=0)
-    if dt <= ref: dt += timedelta(days=1)
-    return dt
+    return dt + (timedelta(days=1) if dt <= ref else timedelta(0))
 
 def parse_duration(num, unit, ref=None):
-    ref = ref or datetime.now()
-    if 'hour' in unit: return ref + timedelta(hours=num)
-    return ref + timedelta(minutes=num)
+    # table hit for the usual spellings, otherwise the original 'hour'-substring rule
+    step = DURATION_TABLE.get(unit) or (timedelta(hours=1) if 'hour' in unit else timedelta(minutes=1))
+    return (ref or datetime.now()) + num * step
 
 def interpret(text):
     joined = " ".join(tokenize(text))
     result = {'command_text': text, 'action_type': None, 'device': None,
               'task': None, 'scheduled_time': None, 'state': None}
-    # Device control
-    m = re.search(r'(turn|switch)\s+(on|off)\s+(?:the\s+)?((?:living|kitchen|bedroom|bathroom)\s+)?(lights?|fan|heater|air conditioner)', joined)
-    if m:
-        room = (m.group(3) or '').strip()
-        device = (room + " " + m.group(4)).strip()
-        result.update({'action_type': 'device', 'device': device, 'state': m.group(2)})
+    m = _CMD_RE.search(joined)
+    if not m:
         return result
-    # Reminder/schedule
-    m = re.search(r'(remind me to|set alarm for|schedule a)\s+(.+?)\s+(at\s+\d{1,2}\s*(?:am|pm)|after\s+\d+\s+(?:hours|minutes)|tomorrow\s+at\s+\d{1,2}\s*(?:am|pm))', joined)
-    if m:
-        phrase = m.group(3)
-        if 'after' in phrase:
-            n = int(re.search(r'(\d+)', phrase).group(1))
-            unit = 'hours' if 'hour' in phrase else 'minutes'
-            t = parse_duration(n, unit)
-        elif 'tomorrow' in phrase:
-            hr = re.search(r'(\d{1,2}\s*(?:am|pm))', phrase).group(1)
-            t = parse_time_of_day(hr, datetime.now() + timedelta(days=1))
+    g = m.groupdict()
+    if g['dev']:  # device control
+        device = ((g['room'] or '') + " " + g['dev']).strip()
+        result.update({'action_type': 'device', 'device': device, 'state': g['state']})
+    else:  # reminder/schedule
+        if g['dur_n']:
+            t = parse_duration(int(g['dur_n']), g['dur_u'])
+        elif g['tm_h']:
+            t = parse_time_of_day(f"{g['tm_h']} {g['tm_ap']}", datetime.now() + timedelta(days=1))
         else:
-            hr = re.search(r'(\d{1,2}\s*(?:am|pm))', phrase).group(1)
-            t = parse_time_of_day(hr)
-        result.update({'action_type': 'schedule', 'task': m.group(2).strip(), 'scheduled_time': t})
-        return result
+            t = parse_time_of_day(f"{g['at_h']} {g['at_ap']}")
+        result.update({'action_type': 'schedule', 'task': g['task'].strip(), 'scheduled_time': t})
     return result
 
 # ---------- Scheduler ----------
 class AssistantScheduler:
     def __init__(self, ctrl):
         self.ctrl = ctrl
-        self.sched = sched.scheduler(time.time, time.sleep)
+        self.wake = threading.Event()
+        self.sched = sched.scheduler(time.time, self._delay)
         threading.Thread(target=self.run, daemon=True).start()
 
+    def _delay(self, timeout):
+        # sleep until the next event is due, or until add() queues an earlier one
+        self.wake.wait(timeout)
+        self.wake.clear()
+
     def run(self):
         while True:
-            self.sched.run(blocking=False)
-            time.sleep(0.5)
+            self.sched.run()  # blocks until the queue is empty
+            self.wake.wait()
+            self.wake.clear()
 
     def add(self, t, func, meta):
         self.sched.enterabs(t.timestamp(), 1, func, argument=(meta,))
+        self.wake.set()
 
 # ---------- Main Assistant ----------
 class SmartHomeAssistant:
     def __init__(self):
-        init_db()
+        self.db = EventStore()
         self.ctrl = DeviceController()
         self.scheduler = AssistantScheduler(self.ctrl)
 
     def handle(self, text):
-        tokens = tokenize(text)
-        ok, trace = parse_command(tokens)
+        ok = recognize(text)
         sem = interpret(text)
-        now = datetime.now()
 
         if sem['action_type'] == 'device':
             done = self.ctrl.set_device(sem['device'], sem['state'])
-            ev = {'id': str(uuid.uuid4()), 'ts_created': now.isoformat(), 'command_text': text,
+            ev = {'id': uuid.uuid4().bytes, 'ts_created': time.time_ns(), 'command_text': text,
                   'action_type': 'device', 'target': sem['device'], 'scheduled_time': '',
                   'status': 'done' if done else 'failed', 'meta': {'state': sem['state']}}
-            persist_event(ev)
-            return {"ok": ok, "trace": trace,
-                    "result": "✅ Device command executed" if done else "⚠️ Unknown device"}
+            self.db.persist_event(ev)
+            return {"ok": ok, "result": "✅ Device command executed" if done else "⚠️ Unknown device"}
 
         elif sem['action_type'] == 'schedule':
             def remind(m):
                 print(f"\n🔔 Reminder Alert: {m.get('task')} (Triggered at {datetime.now().strftime('%H:%M:%S')})\n")
             self.scheduler.add(sem['scheduled_time'], remind, {'task': sem['task']})
-            ev = {'id': str(uuid.uuid4()), 'ts_created': now.isoformat(), 'command_text': text,
+            ev = {'id': uuid.uuid4().bytes, 'ts_created': time.time_ns(), 'command_text': text,
                   'action_type': 'schedule', 'target': sem['task'],
                   'scheduled_time': sem['scheduled_time'].isoformat(), 'status': 'scheduled', 'meta': {}}
-            persist_event(ev)
-            return {"ok": ok, "trace": trace, "result": f"🕒 Reminder set for {sem['scheduled_time']}"}
+            self.db.persist_event(ev)
+            return {"ok": ok, "result": f"🕒 Reminder set for {sem['scheduled_time']}"}
 
         else:
-            return {"ok": False, "trace": trace, "result": "❌ Command not recognized"}
+            return {"ok": False, "result": "❌ Command not recognized"}
 
 # ---------- Interactive Mode (Improved Output) ----------
 def interactive_mode():
@@ -3,11 +3,18 @@
 # Enterprise-Style CLI Interface (UI Enhanced Only)
 # ==========================================================
 
-import re, uuid, sqlite3, time, threading, sched
+import re, uuid, sqlite3, time, threading, sched, atexit
+from functools import lru_cache
 from datetime import datetime
+import numpy as np
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.linear_model import LogisticRegression
 
+try:  # optional: google-re2 matches the CFG patterns with a linear-time DFA
+    import re2
+except ImportError:
+    re2 = None
+
 # ---------------- TERMINAL UI ----------------
 class UI:
     RESET = "\033[0m"
@@ -54,34 +61,92 @@ class UI:
 # ---------------- CONFIG ----------------
 DB_NAME = "smart_home.db"
 DEFAULT_LIGHT = "living room light"
+LOG_FLUSH_EVERY = 32       # buffered events that trigger an early commit
+LOG_FLUSH_INTERVAL = 2.0   # seconds between background commits
+SIMULATE_LATENCY_S = 0.0   # fake device round-trip; e.g. 0.4 for a demo pause
 
 # ---------------- DATABASE ----------------
-def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("""
+def _iso_to_ns(ts):
+    return round(datetime.fromisoformat(ts).timestamp() * 1e6) * 1000
+
+def init_db(conn):
+    # Rows are keyed by 16-byte uuid BLOBs with epoch-nanosecond times.
+    # A table from the older TEXT uuid/ISO schema is converted in place.
+    old = conn.execute("PRAGMA table_info(logs)").fetchall()
+    migrate = bool(old) and old[0][2].upper() == "TEXT"
+    if migrate:
+        conn.execute("ALTER TABLE logs RENAME TO logs_text")
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS logs (
-            id TEXT PRIMARY KEY,
-            time TEXT,
+            id BLOB PRIMARY KEY,
+            time INTEGER,
             command TEXT,
             intent TEXT,
             source TEXT,
             status TEXT
         )
     """)
+    if migrate:
+        rows = conn.execute("SELECT * FROM logs_text").fetchall()
+        conn.executemany("INSERT INTO logs VALUES (?, ?, ?, ?, ?, ?)",
+                         [(uuid.UUID(r[0]).bytes, _iso_to_ns(r[1])) + tuple(r[2:]) for r in rows])
+        conn.execute("DROP TABLE logs_text")
     conn.commit()
-    conn.close()
-
-def log_event(cmd, intent, source, status):
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO logs VALUES (?, ?, ?, ?, ?, ?)",
-        (str(uuid.uuid4()), datetime.now().isoformat(),
-         cmd, intent, source, status)
-    )
-    conn.commit()
-    conn.close()
+
+class EventLog:
+    """One long-lived connection; events are queued and committed in batches."""
+
+    def __init__(self, path=DB_NAME):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        init_db(self.conn)
+        self.lock = threading.Lock()
+        self.pending = []
+        self.wake = threading.Event()
+        self.closed = False
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+        atexit.register(self.close)
+
+    def log_event(self, cmd, intent, source, status):
+        with self.lock:
+            self.pending.append((uuid.uuid4().bytes, time.time_ns(),
+                                 cmd, intent, source, status))
+            full = len(self.pending) >= LOG_FLUSH_EVERY
+        if full:
+            self.wake.set()
+
+    def flush(self):
+        # rows leave the queue only once they are committed; on error they stay for the next try
+        with self.lock:
+            if self.closed or not self.pending:
+                return
+            try:
+                self.conn.executemany("INSERT INTO logs VALUES (?, ?, ?, ?, ?, ?)", self.pending)
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+            self.pending = []
+
+    def close(self):
+        # final flush, then close so SQLite checkpoints the WAL into the .db file
+        try:
+            self.flush()
+        finally:
+            with self.lock:
+                if not self.closed:
+                    self.closed = True
+                    self.conn.close()
+
+    def _flush_loop(self):
+        while True:
+            self.wake.wait(LOG_FLUSH_INTERVAL)
+            self.wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                UI.warn(f"Log flush failed, will retry: {e}")
 
 # ---------------- DEVICE CONTROLLER ----------------
 class DeviceController:
@@ -94,7 +159,8 @@ class DeviceController:
 
     def set_device(self, device, state):
         UI.info("Executing device command")
-        time.sleep(0.4)
+        if SIMULATE_LATENCY_S:
+            time.sleep(SIMULATE_LATENCY_S)
 
         if device in self.devices:
             self.devices[device] = state
@@ -105,16 +171,24 @@ class DeviceController:
         return False
 
 # ---------------- NORMALIZATION ----------------
+# ASCII characters outside [\w\s]; non-ASCII input falls back to the regex
+_NORMALIZE_TABLE = str.maketrans({c: None for c in map(chr, range(128))
+                                  if not (c.isalnum() or c.isspace() or c == "_")})
+_NORM_RE = re.compile(r"[^\w\s]")
+
 def normalize(text):
-    return re.sub(r"[^\w\s]", "", text.lower())
+    text = text.lower().translate(_NORMALIZE_TABLE)
+    return text if text.isascii() else _NORM_RE.sub("", text)
 
 # ---------------- CFG MATCH ----------------
+# Both grammar shapes in one alternation, so a single scan decides the match
+_CFG_RE = (re2 or re).compile(
+    r"(turn|switch)\s+(on|off)\s+(living room light|kitchen fan|bedroom heater)"
+    r"|(living room light|kitchen fan|bedroom heater)\s+(on|off)"
+)
+
 def cfg_device_match(text):
-    patterns = [
-        r"(turn|switch)\s+(on|off)\s+(living room light|kitchen fan|bedroom heater)",
-        r"(living room light|kitchen fan|bedroom heater)\s+(on|off)"
-    ]
-    return any(re.search(p, text) for p in patterns)
+    return _CFG_RE.search(text) is not None
 
 # ---------------- ML CLASSIFIER ----------------
 class MLIntentClassifier:
@@ -136,8 +210,26 @@ class MLIntentClassifier:
 
         self.model.fit(self.vec.fit_transform(X), y)
 
-    def predict(self, text):
-        return self.model.predict(self.vec.transform([text]))[0]
+        # Dense copies of the fitted model: predict() is one W @ v + b
+        self.V = self.vec.vocabulary_
+        self.W = self.model.coef_.astype(np.float32)
+        self.b = self.model.intercept_.astype(np.float32)
+        self.classes = self.model.classes_.tolist()
+
+        # predict() is pure once fitted; repeated commands skip the scoring
+        self.predict = lru_cache(maxsize=512)(self._predict)
+
+    def _predict(self, text):
+        # text comes from normalize(), so split() yields the vectorizer's tokens
+        v = np.zeros(len(self.V), np.float32)
+        for w in text.split():
+            j = self.V.get(w)
+            if j is not None:
+                v[j] += 1
+        scores = self.W @ v + self.b
+        # a two-class model has a single row: a positive score means classes[1]
+        idx = int(scores[0] > 0) if len(scores) == 1 else int(scores.argmax())
+        return self.classes[idx]
 
 # ---------------- SEMANTIC EXTRACTION ----------------
 def extract_device(text):
@@ -177,7 +269,7 @@ class ReminderScheduler:
 # ---------------- MAIN ASSISTANT ----------------
 class SmartHomeAssistant:
     def __init__(self):
-        init_db()
+        self.db = EventLog()
         self.ctrl = DeviceController()
         self.ml = MLIntentClassifier()
         self.scheduler = ReminderScheduler()
@@ -199,13 +291,13 @@ class SmartHomeAssistant:
 
             if not device or not state:
                 UI.warn("Device command incomplete (use ON or OFF)")
-                log_event(command, "device", "CFG", "failed")
+                self.db.log_event(command, "device", "CFG", "failed")
                 return
 
             UI.step(3, "Device Execution (CFG)")
             self.ctrl.set_device(device, state)
 
-            log_event(command, "device", "CFG", "success")
+            self.db.log_event(command, "device", "CFG", "success")
             UI.info("Decision Source → CFG")
             return
 
@@ -221,13 +313,13 @@ class SmartHomeAssistant:
 
             if not device or not state:
                 UI.warn("Device detected but action missing (use ON or OFF)")
-                log_event(command, "device", "ML", "failed")
+                self.db.log_event(command, "device", "ML", "failed")
                 return
 
             UI.step(4, "Device Execution (ML)")
             self.ctrl.set_device(device, state)
 
-            log_event(command, "device", "ML", "success")
+            self.db.log_event(command, "device", "ML", "success")
             UI.info("Decision Source → ML")
             return
 
@@ -235,7 +327,7 @@ class SmartHomeAssistant:
             UI.step(4, "Reminder Scheduling")
             self.scheduler.add(command)
 
-            log_event(command, "schedule", "ML", "scheduled")
+            self.db.log_event(command, "schedule", "ML", "scheduled")
             UI.info("Decision Source → ML")
             return
 